@@ -33,20 +33,30 @@ from common.platform_info import PlatformInfo
 from common.bus_call import bus_call
 from common.utils import long_to_uint64
 
+import numpy as np
 import pyds
 import time
 import yaml
 
 # 👉 네가 만든 전낙상 로직 / 설정 타입
-from src.zone_logic_simple import SimpleZoneMonitor, load_zone_config
+# 컴파일된 Cython 구현(setup.py build_ext --inplace)이 있으면 그걸 쓰고,
+# 없으면 순수 파이썬 구현으로 폴백한다.
+from src.zone_logic_simple import load_zone_config
+try:
+    from src.zone_logic_fast import SimpleZoneMonitor
+except ImportError:
+    from src.zone_logic_simple import SimpleZoneMonitor
 
 
 # 👉 상태 JSON / 타임라인 CSV 저장
-from src.storage import write_status
+from src.storage import StatusWriter
 
 # 👉 콘솔에 ALERT 찍을 때 사용
 from src.alerts import console_alert
 
+# 👉 probe 스레드에서 블로킹 I/O를 빼내는 백그라운드 워커
+from src.sidecar import submit as sidecar_submit
+
 
 MAX_DISPLAY_LEN = 64
 MAX_TIME_STAMP_LEN = 32
@@ -70,8 +80,26 @@ MSCONV_CONFIG_FILE = "dstest4_msgconv_config.txt"
 
 pgie_classes_str = ["Vehicle", "TwoWheeler", "Person", "Roadsign"]
 
+# level별 박스 색 (RGBA). 매 객체 if/elif 분기 대신 dict 한 번 조회.
+LEVEL_COLORS = {
+    "SAFE": (0.0, 1.0, 0.0, 1.0),           # 초록
+    "PREFALL_SHORT": (1.0, 1.0, 0.0, 1.0),  # 노랑
+    "PREFALL_ALERT": (1.0, 0.0, 0.0, 1.0),  # 빨강
+}
+
+# display_text 앞부분은 level별로 고정 — f-string 전체를 매번 만들지 않는다.
+LEVEL_PREFIX = {
+    "SAFE": "Person | SAFE ",
+    "PREFALL_SHORT": "Person | PREFALL_SHORT ",
+    "PREFALL_ALERT": "Person | PREFALL_ALERT ",
+}
+
 OUTPUT_STATUS_PATH = os.path.join(os.path.dirname(__file__), "output", "status.json")
 
+# sys.getsizeof는 호출마다 타입 메타데이터를 훑는다 — import 시 한 번만 계산
+_VEHICLE_OBJ_SIZE = sys.getsizeof(pyds.NvDsVehicleObject)
+_PERSON_OBJ_SIZE = sys.getsizeof(pyds.NvDsPersonObject)
+
 def generate_vehicle_meta(data):
     obj = pyds.NvDsVehicleObject.cast(data)
     obj.type = "sedan"
@@ -113,7 +141,7 @@ def generate_event_msg_meta(data, class_id):
         obj = pyds.alloc_nvds_vehicle_object()
         obj = generate_vehicle_meta(obj)
         meta.extMsg = obj
-        meta.extMsgSize = sys.getsizeof(pyds.NvDsVehicleObject)
+        meta.extMsgSize = _VEHICLE_OBJ_SIZE
     if class_id == PGIE_CLASS_ID_PERSON:
         meta.type = pyds.NvDsEventType.NVDS_EVENT_ENTRY
         meta.objType = pyds.NvDsObjectType.NVDS_OBJECT_TYPE_PERSON
@@ -121,139 +149,175 @@ def generate_event_msg_meta(data, class_id):
         obj = pyds.alloc_nvds_person_object()
         obj = generate_person_meta(obj)
         meta.extMsg = obj
-        meta.extMsgSize = sys.getsizeof(pyds.NvDsPersonObject)
+        meta.extMsgSize = _PERSON_OBJ_SIZE
     return meta
 
 
-# osd_sink_pad_buffer_probe  will extract metadata received on OSD sink pad
-# and update params for drawing rectangle, object information etc.
+# The probe will extract metadata from the buffer and update params for
+# drawing rectangle, object information etc.
+# The probe is attached to the pgie src pad so downstream convert/OSD
+# work overlaps with the Python logic.
 # IMPORTANT NOTE:
 # a) probe() callbacks are synchronous and thus holds the buffer
 #    (info.get_buffer()) from traversing the pipeline until user return.
 # b) loops inside probe() callback could be costly in python.
 #    So users shall optimize according to their use-case.
-# osd_sink_pad_buffer_probe  will extract metadata received on OSD sink pad
-# and update params for drawing rectangle, object information etc.
-def osd_sink_pad_buffer_probe(pad, info, u_data):
+def make_probe(zone_monitor, status_writer, camera_id, fps_hint, person_class_id):
     """
-    DeepStream가 프레임마다 부르는 콜백.
-    여기서:
+    전낙상 pad-probe 콜백 팩토리.
+
+    예전에는 u_data 딕셔너리로 zone_monitor 등을 넘기고 콜백마다
+    dict.get + float 변환을 반복했는데, 여기서 전부 클로저 지역변수로
+    한 번만 캡처한다. dt도 상수로 고정된다.
+
+    반환된 콜백은 버퍼(또는 버퍼 리스트)마다:
       - 사람(person) 객체만 골라서
       - 침대 Zone1 전낙상 로직(SimpleZoneMonitor)에 넣고
       - 박스 색(초록/노랑/빨강) 바꾸고
       - status.json에 상태를 기록한다.
     """
-    frame_number = 0
+    # 프레임 간 시간 간격(dt)을 단순히 fps로부터 추정 (예: 30fps → 1/30초)
+    dt = 1.0 / fps_hint if fps_hint > 0 else 1.0 / 30.0
+    text_cache = {}
+
+    def probe(pad, info, _u_data):
+        # 업스트림이 buffer list를 밀어주면 콜백 한 번에 여러 버퍼를 처리한다.
+        # get_buffer_list()는 BUFFER_LIST 타입이 아닌 info에서 부르면
+        # GStreamer-CRITICAL을 찍으므로 타입 플래그를 먼저 확인한다.
+        buffer_list = None
+        if info.type & Gst.PadProbeType.BUFFER_LIST:
+            buffer_list = info.get_buffer_list()
+        if buffer_list is not None:
+            buffers = [buffer_list.get(i) for i in range(buffer_list.length())]
+        else:
+            gst_buffer = info.get_buffer()
+            if not gst_buffer:
+                print("Unable to get GstBuffer ")
+                return Gst.PadProbeReturn.OK
+            buffers = (gst_buffer,)
+
+        for gst_buffer in buffers:
+            process_buffer(gst_buffer, zone_monitor, status_writer,
+                           camera_id, person_class_id, text_cache, dt)
 
-    # u_data: main()에서 넘긴 딕셔너리 (zone_monitor, camera_id, fps_hint, person_class_id)
-    if u_data is None:
         return Gst.PadProbeReturn.OK
 
-    zone_monitor: SimpleZoneMonitor = u_data.get("zone_monitor")
-    camera_id = u_data.get("camera_id", "cam01")
-    fps_hint = float(u_data.get("fps_hint", 30.0))
-    person_class_id = int(u_data.get("person_class_id", PGIE_CLASS_ID_PERSON))
+    return probe
 
-    # 프레임 간 시간 간격(dt)을 단순히 fps로부터 추정 (예: 30fps → 1/30초)
-    dt = 1.0 / fps_hint if fps_hint > 0 else 1.0 / 30.0
 
-    gst_buffer = info.get_buffer()
-    if not gst_buffer:
-        print("Unable to get GstBuffer ")
-        return Gst.PadProbeReturn.OK
+def process_buffer(gst_buffer, zone_monitor, status_writer,
+                   camera_id, person_class_id, text_cache, dt):
+    """버퍼 하나의 batch_meta를 걷어 전낙상 로직을 적용한다."""
+    frame_number = 0
 
     # DeepStream 메타데이터(batch_meta) 가져오기
     batch_meta = pyds.gst_buffer_get_nvds_batch_meta(hash(gst_buffer))
     if not batch_meta:
-        return Gst.PadProbeReturn.OK
+        return
 
-    # 프레임들 순회
+    # 프레임들 순회 — l_frame.next는 끝에서 None을 돌려줄 뿐
+    # StopIteration을 던지지 않으므로 try/except 없이 그냥 걷는다.
     l_frame = batch_meta.frame_meta_list
     while l_frame is not None:
-        try:
-            frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
-        except StopIteration:
-            break
+        frame_meta = pyds.NvDsFrameMeta.cast(l_frame.data)
 
         frame_number = frame_meta.frame_num
 
-        # 이 프레임 안의 객체들 순회
+        # 이 프레임 안의 객체들 순회 (1차: 사람 bbox/track_id만 모은다)
+        # 객체마다 zone_monitor.update()를 부르는 대신, 링크드 리스트를
+        # 한 번만 걷어 bbox를 전부 모아 프레임당 한 번 update_batch()로 판정한다.
+        persons = []
+        track_ids = []
+        bboxes = []
         l_obj = frame_meta.obj_meta_list
         while l_obj is not None:
-            try:
-                obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
-            except StopIteration:
-                break
+            obj_meta = pyds.NvDsObjectMeta.cast(l_obj.data)
 
             # DeepStream이 붙여준 class_id 기준으로 "사람"만 전낙상 로직에 사용
             if obj_meta.class_id == person_class_id and zone_monitor is not None:
                 rect = obj_meta.rect_params
-                bbox = (rect.left, rect.top, rect.width, rect.height)
+                persons.append(obj_meta)
+                track_ids.append(int(obj_meta.object_id))
+                bboxes.append((rect.left, rect.top, rect.width, rect.height))
 
-                # 👇 네가 만든 전낙상 뇌 호출 (Zone1만 사용하는 SimpleZoneMonitor)
-                res = zone_monitor.update(bbox=bbox, dt=dt)
-
-                in_zone1 = bool(res.get("in_zone1", False))
-                dwell = float(res.get("dwell", 0.0))
-                level = res.get("level", "SAFE")  # "SAFE" / "PREFALL_SHORT" / "PREFALL_ALERT"
+            # 다음 객체로
+            l_obj = l_obj.next
+
+        if persons:
+            # 👇 전낙상 뇌 호출: 프레임당 1회 (Zone1만 사용하는 SimpleZoneMonitor)
+            in_zone1_arr, dwell_arr, level_list, new_alert_arr = zone_monitor.update_batch(
+                np.asarray(bboxes, dtype=np.float64), track_ids, dt=dt
+            )
+
+            # 2차: 판정 결과를 각 객체 메타에 반영
+            for obj_meta, track_id, in_zone1, dwell, level, new_alert in zip(
+                persons, track_ids, in_zone1_arr, dwell_arr, level_list, new_alert_arr
+            ):
+                in_zone1 = bool(in_zone1)
+                dwell = float(dwell)
+                rect = obj_meta.rect_params
 
                 # --- 박스 스타일 바꾸기 ---
                 rect.border_width = 3
-                if level == "SAFE":
-                    # 초록
-                    rect.border_color.set(0.0, 1.0, 0.0, 1.0)
-                elif level == "PREFALL_SHORT":
-                    # 노랑
-                    rect.border_color.set(1.0, 1.0, 0.0, 1.0)
-                elif level == "PREFALL_ALERT":
-                    # 빨강
-                    rect.border_color.set(1.0, 0.0, 0.0, 1.0)
+                color = LEVEL_COLORS.get(level)
+                if color is not None:
+                    rect.border_color.set(*color)
 
                 # --- 화면에 표시되는 텍스트 업데이트 ---
+                # NvDsObjectMeta는 버퍼마다 메타 풀에서 새로 할당되므로
+                # setter는 매 프레임 다시 써야 한다. 캐시가 아끼는 건
+                # (level, 0.1초 단위 dwell)이 같을 때의 문자열 조립뿐이다.
+                key = (level, int(dwell * 10))
+                cached = text_cache.get(track_id)
+                if cached is not None and cached[0] == key:
+                    text = cached[1]
+                else:
+                    text = LEVEL_PREFIX[level] + f"{dwell:.1f}s"
+                    text_cache[track_id] = (key, text)
                 txt_params = obj_meta.text_params
-                txt_params.display_text = f"Person | {level} {dwell:.1f}s"
+                txt_params.display_text = text
                 txt_params.font_params.font_name = "Serif"
                 txt_params.font_params.font_size = 10
                 txt_params.font_params.font_color.set(1.0, 1.0, 1.0, 1.0)
                 txt_params.set_bg_clr = 1
                 txt_params.text_bg_clr.set(0.0, 0.0, 0.0, 0.8)
 
-                # --- 상태 파일(status.json)로 기록 ---
-                try:
-                    write_status(
-                        OUTPUT_STATUS_PATH,
+                # --- 상태 기록: sidecar 워커 스레드에 넘긴다 (probe는 put만) ---
+                if status_writer is not None:
+                    sidecar_submit(
+                        status_writer.update,
                         camera_id=camera_id,
-                        track_id=int(obj_meta.object_id),
+                        track_id=track_id,
                         prefall=in_zone1,
                         dwell=dwell,
                     )
-                except Exception as e:
-                    print("write_status error:", e)
 
-                # --- ALERT면 콘솔에도 한 번 찍어주기 ---
-                if level == "PREFALL_ALERT":
+                # --- 새 ALERT면 콘솔에도 찍어주기 (cooldown_sec 동안 재발화 억제) ---
+                if new_alert:
                     try:
-                        console_alert(camera_id, int(obj_meta.object_id), dwell)
+                        console_alert(camera_id, track_id, level,
+                                      f"dwell={dwell:.1f}s")
                     except Exception as e:
                         print("console_alert error:", e)
 
-            # 다음 객체로
-            try:
-                l_obj = l_obj.next
-            except StopIteration:
-                break
+        # 이번 프레임에 없는 트랙은 텍스트 캐시에서 정리 (무한 성장 방지)
+        if len(text_cache) > len(track_ids):
+            live = set(track_ids)
+            for tid in [t for t in text_cache if t not in live]:
+                del text_cache[tid]
 
         # 다음 프레임으로
-        try:
-            l_frame = l_frame.next
-        except StopIteration:
-            break
-
-    return Gst.PadProbeReturn.OK
+        l_frame = l_frame.next
 
 
 def main(args):
     platform_info = PlatformInfo()
+
+    # GstLatencyTracer 활성화: 요소별/파이프라인 지연이 GST_TRACER 로그로
+    # 나온다 (이미 환경변수를 지정했다면 건드리지 않는다).
+    os.environ.setdefault("GST_TRACERS", "latency(flags=pipeline+element+reported)")
+    os.environ.setdefault("GST_DEBUG", "GST_TRACER:7")
+
     Gst.init(None)
 
     # === Bedwatch Zone1 설정 불러오기 & 모니터 생성 ===
@@ -268,14 +332,18 @@ def main(args):
     zone_cfg = load_zone_config(zone_cfg_path)
     zone_monitor = SimpleZoneMonitor(zone_cfg)
 
-    # pad-probe에 같이 넘길 데이터 묶음
-    user_data = {
-        "zone_monitor": zone_monitor,
-        "camera_id": getattr(zone_cfg, "camera_id", "cam01"),
-        "fps_hint": getattr(zone_cfg, "fps", 30.0),
+    # 상태 기록기: append-only jsonl + 1초 주기 status.json 스냅샷
+    status_writer = StatusWriter(OUTPUT_STATUS_PATH, snapshot_interval=1.0)
+
+    # pad-probe 콜백: 필요한 값은 전부 클로저로 캡처 (u_data 딕셔너리 불필요)
+    probe = make_probe(
+        zone_monitor=zone_monitor,
+        status_writer=status_writer,
+        camera_id=getattr(zone_cfg, "camera_id", "cam01"),
+        fps_hint=float(getattr(zone_cfg, "fps", 30.0)),
         # 사람 class_id (PeopleNet 기본 0, 모델에 따라 조정 가능)
-        "person_class_id": PGIE_CLASS_ID_PERSON,
-    }
+        person_class_id=PGIE_CLASS_ID_PERSON,
+    )
 
     # Deprecated: following meta_copy_func and meta_free_func
     # have been moved to the binding as event_msg_meta_copy_func()
@@ -344,6 +412,15 @@ def main(args):
     if not queue2:
         sys.stderr.write(" Unable to create queue2 \n")
 
+    # 기본 queue는 사실상 무제한 버퍼링이라 msgbroker나 probe가 막히면
+    # 프레임이 쌓이며 지연이 무한정 커진다. 2버퍼 + leaky=downstream으로
+    # 묶어서 과부하 시 오래된 버퍼를 버리고 지연을 상수로 유지한다.
+    for q in (queue1, queue2):
+        q.set_property("max-size-buffers", 2)
+        q.set_property("max-size-time", 0)
+        q.set_property("max-size-bytes", 0)
+        q.set_property("leaky", 2)  # downstream
+
     if no_display:
         print("Creating FakeSink \n")
         sink = Gst.ElementFactory.make("fakesink", "fakesink")
@@ -381,6 +458,8 @@ def main(args):
     if topic is not None:
         msgbroker.set_property("topic", topic)
     msgbroker.set_property("sync", False)
+    # 렌더/페이크 싱크도 클록 동기화를 끄고 받는 즉시 소비
+    sink.set_property("sync", False)
 
     print("Adding elements to Pipeline \n")
     pipeline.add(source)
@@ -431,15 +510,18 @@ def main(args):
     bus.add_signal_watch()
     bus.connect("message", bus_call, loop)
 
-    osdsinkpad = nvosd.get_static_pad("sink")
-    if not osdsinkpad:
-        sys.stderr.write(" Unable to get sink pad of nvosd \n")
-
-    # Bedwatch용 pad-probe: user_data에 zone_monitor 등 정보를 담아서 넘김
-    osdsinkpad.add_probe(
-        Gst.PadProbeType.BUFFER,
-        osd_sink_pad_buffer_probe,
-        user_data,
+    # Bedwatch용 pad-probe: nvosd sink 대신 pgie src pad에 단다.
+    # 메타데이터는 이미 붙어 있고, 다운스트림 변환/OSD 렌더링이
+    # 파이썬 로직과 병렬로 돌 수 있다. BUFFER_LIST도 받아서
+    # 업스트림이 리스트를 밀면 콜백 한 번에 여러 버퍼를 처리한다.
+    pgiesrcpad = pgie.get_static_pad("src")
+    if not pgiesrcpad:
+        sys.stderr.write(" Unable to get src pad of pgie \n")
+
+    pgiesrcpad.add_probe(
+        Gst.PadProbeType.BUFFER | Gst.PadProbeType.BUFFER_LIST,
+        probe,
+        None,
     )
 
     print("Starting pipeline \n")
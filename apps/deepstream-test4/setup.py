@@ -0,0 +1,21 @@
+# src/zone_logic_fast.pyx 빌드용 (선택 사항):
+#   python setup.py build_ext --inplace
+# 빌드하지 않으면 앱은 순수 파이썬 zone_logic_simple로 동작한다.
+from setuptools import Extension, setup
+
+import numpy as np
+from Cython.Build import cythonize
+
+setup(
+    name="bedwatch-zone-logic-fast",
+    # 모듈 이름을 명시해야 .so가 src/ 안에 src.zone_logic_fast로 떨어지고,
+    # 앱의 `from src.zone_logic_fast import ...` 폴백 임포트가 잡는다.
+    ext_modules=cythonize(
+        [Extension(
+            "src.zone_logic_fast",
+            ["src/zone_logic_fast.pyx"],
+            include_dirs=[np.get_include()],
+        )],
+        compiler_directives={"language_level": 3},
+    ),
+)
@@ -1,16 +1,74 @@
 
-import json, time
+import json, logging, queue, sys, time
+from logging.handlers import QueueHandler, QueueListener
 from urllib import request
-def console_alert(cam_id: str, track_id: int, level: str, detail: str):
-    ts = time.strftime('%Y-%m-%d %H:%M:%S')
-    print(f"[{ts}] [{cam_id}] track={track_id} >> {level} :: {detail}", flush=True)
-def http_alert(endpoint: str, cam_id: str, track_id: int, level: str, detail: str, timeout: float=2.0):
+
+from .sidecar import submit
+
+# HTTP payload 직렬화: orjson이 있으면 바로 bytes로 (인코딩 단계 생략)
+try:
+    import orjson
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+# 알림마다 새 TCP 연결(및 https면 TLS 핸드셰이크)을 맺지 않도록
+# keep-alive 세션을 모듈 레벨에서 하나 재사용한다. requests가 없으면
+# 기존 urllib 경로로 폴백.
+try:
+    import requests
+
+    _session = requests.Session()
+    _adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=8)
+    _session.mount("http://", _adapter)
+    _session.mount("https://", _adapter)
+except ImportError:
+    _session = None
+
+# 콘솔 알림은 logging + QueueHandler로 처리한다. probe 스레드는 레코드를
+# 큐에 넣기만 하고, 실제 포맷팅과 stdout 쓰기는 QueueListener 스레드가
+# 담당한다 (느린 tty/파이프에 probe가 막히지 않음). %(asctime)s는
+# 로거가 초 단위로 캐시하므로 호출마다 time.strftime을 돌리지 않는다.
+logger = logging.getLogger("bedwatch.alerts")
+if not logger.handlers:
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    _log_queue: "queue.Queue" = queue.Queue(-1)
+    logger.addHandler(QueueHandler(_log_queue))
+    _stream_handler = logging.StreamHandler(sys.stdout)
+    _stream_handler.setFormatter(logging.Formatter(
+        "[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
+    _listener = QueueListener(_log_queue, _stream_handler)
+    _listener.start()
+
+
+def console_alert(cam_id: str, track_id: int, level: str, detail: str = ""):
+    # lazy %-포맷: 레코드가 실제로 출력될 때 리스너 스레드에서 조립된다
+    logger.warning("[%s] track=%d >> %s :: %s", cam_id, track_id, level, detail)
+
+
+def _do_http_alert(endpoint: str, cam_id: str, track_id: int, level: str, detail: str, timeout: float=2.0):
     payload = {"timestamp": time.time(),"camera_id": cam_id,"track_id": track_id,"level": level,"detail": detail}
-    data = json.dumps(payload).encode("utf-8")
-    req = request.Request(endpoint, data=data, headers={"Content-Type": "application/json"})
+    data = _dumps_bytes(payload)
     try:
+        if _session is not None:
+            resp = _session.post(
+                endpoint, data=data,
+                headers={"Content-Type": "application/json"},
+                timeout=timeout,
+            )
+            return resp.status_code, resp.content
+        req = request.Request(endpoint, data=data, headers={"Content-Type": "application/json"})
         with request.urlopen(req, timeout=timeout) as resp:
             return resp.status, resp.read()
     except Exception as e:
         print(f"[WARN] http_alert failed: {e}")
         return None
+
+
+def http_alert(endpoint: str, cam_id: str, track_id: int, level: str, detail: str, timeout: float=2.0):
+    """HTTP POST를 sidecar 워커에 넘긴다 — probe 스레드에서 불러도 블로킹 없음."""
+    submit(_do_http_alert, endpoint, cam_id, track_id, level, detail, timeout)
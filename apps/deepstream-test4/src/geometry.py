@@ -1,28 +1,76 @@
 
-from typing import List, Tuple
-import math
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba가 없으면 순수 파이썬으로 그대로 동작하는 no-op 데코레이터
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+
+        def wrap(fn):
+            return fn
+        return wrap
+
 Point = Tuple[float, float]
-def point_in_polygon(p: Point, poly: List[Point]) -> bool:
+
+
+@njit(cache=True, fastmath=True)
+def point_in_polygon(p: Point, poly: np.ndarray) -> bool:
+    # poly: (M,2) float64 ndarray
     x, y = p
     inside = False
-    n = len(poly)
+    n = poly.shape[0]
     for i in range(n):
-        x1, y1 = poly[i]
-        x2, y2 = poly[(i + 1) % n]
-        dy = (y2 - y1) if (y2 - y1) != 0 else 1e-12
-        if ((y1 > y) != (y2 > y)) and (x < (x2 - x1) * (y - y1) / dy + x1):
+        x1 = poly[i, 0]
+        y1 = poly[i, 1]
+        j = i + 1
+        if j == n:
+            j = 0
+        x2 = poly[j, 0]
+        y2 = poly[j, 1]
+        dx = x2 - x1
+        dy = y2 - y1
+        # 교차 판정을 외적 부호로 — 나눗셈/엡실론 없음
+        side = (x - x1) * dy - dx * (y - y1)
+        if ((y1 > y) != (y2 > y)) and ((side < 0.0) != (dy < 0.0)):
             inside = not inside
     return inside
-def dist_point_to_segment(p: Point, a: Point, b: Point) -> float:
-    px, py = p; ax, ay = a; bx, by = b
+
+
+@njit(cache=True, fastmath=True)
+def dist_point_to_segment(px: float, py: float,
+                          ax: float, ay: float,
+                          bx: float, by: float) -> float:
     vx, vy = bx - ax, by - ay
     wx, wy = px - ax, py - ay
     c1 = vx * wx + vy * wy
-    if c1 <= 0: return math.hypot(px - ax, py - ay)
+    if c1 <= 0:
+        return np.sqrt((px - ax) * (px - ax) + (py - ay) * (py - ay))
     c2 = vx * vx + vy * vy
-    if c2 <= c1: return math.hypot(px - bx, py - by)
+    if c2 <= c1:
+        return np.sqrt((px - bx) * (px - bx) + (py - by) * (py - by))
     t = c1 / c2
     projx, projy = ax + t * vx, ay + t * vy
-    return math.hypot(px - projx, py - projy)
-def dist_point_to_polygon(p: Point, poly: List[Point]) -> float:
-    return min(dist_point_to_segment(p, poly[i], poly[(i + 1) % len(poly)]) for i in range(len(poly)))
+    dx, dy = px - projx, py - projy
+    return np.sqrt(dx * dx + dy * dy)
+
+
+@njit(cache=True, fastmath=True)
+def dist_point_to_polygon(p: Point, poly: np.ndarray) -> float:
+    px, py = p
+    n = poly.shape[0]
+    dmin = np.inf
+    for i in range(n):
+        j = i + 1
+        if j == n:
+            j = 0
+        d = dist_point_to_segment(px, py,
+                                  poly[i, 0], poly[i, 1],
+                                  poly[j, 0], poly[j, 1])
+        if d < dmin:
+            dmin = d
+    return dmin
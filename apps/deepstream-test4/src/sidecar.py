@@ -0,0 +1,42 @@
+# src/sidecar.py
+#
+# probe() 콜백은 동기(synchronous)라서 그 안에서 디스크 쓰기나 HTTP 호출을
+# 하면 버퍼가 파이프라인을 통과하지 못하고 지연이 쌓인다.
+# 여기 있는 sidecar 워커는 그런 I/O 작업을 bounded queue로 받아
+# 별도 데몬 스레드에서 처리한다. probe 스레드는 put_nowait만 하고
+# 마이크로초 단위로 리턴한다.
+
+import queue
+import threading
+
+_q: "queue.Queue" = queue.Queue(maxsize=256)
+
+
+def _worker():
+    while True:
+        fn, args, kwargs = _q.get()
+        try:
+            fn(*args, **kwargs)
+        except Exception as e:
+            print("[WARN] sidecar task failed:", e)
+
+
+_thread = threading.Thread(target=_worker, daemon=True, name="bedwatch-sidecar")
+_thread.start()
+
+
+def submit(fn, *args, **kwargs) -> bool:
+    """fn(*args, **kwargs)를 워커 스레드에서 실행하도록 큐에 넣는다.
+
+    큐가 가득 차면 가장 오래된 작업을 버리고 새 작업을 넣는다
+    (GStreamer queue의 leaky=downstream과 같은 정책 — 블로킹보다 드랍).
+    """
+    while True:
+        try:
+            _q.put_nowait((fn, args, kwargs))
+            return True
+        except queue.Full:
+            try:
+                _q.get_nowait()
+            except queue.Empty:
+                pass
@@ -1,32 +1,161 @@
 
 
-import json, os, time
+import json, os, threading, time
 from typing import Optional
 
+# 직렬화는 C로 구현된 orjson이 있으면 그걸 쓴다 (없으면 stdlib json)
+try:
+    import orjson
+
+    def _dumps_line(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _dumps_pretty(obj) -> str:
+        return orjson.dumps(
+            obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        ).decode()
+except ImportError:
+    def _dumps_line(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    def _dumps_pretty(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+
 def ensure_dir(path: str):
     d = os.path.dirname(path)
     if d and not os.path.exists(d):
         os.makedirs(d, exist_ok=True)
 
+# write_status용 경로별 인메모리 상태.
+# 예전에는 호출마다 파일 전체를 읽고/파싱하고/다시 썼는데, 상태가
+# 쌓일수록 호출당 비용이 커졌다(런 전체로 보면 O(N^2)). 이제 파일은
+# 경로당 한 번만 읽고, 이후 호출은 dict만 고친다. 디스크 반영은
+# 주기 플러시 스레드가 os.replace로 원자적으로 수행한다.
+_STATE_CACHE = {}
+_LOADED = set()
+_CACHE_LOCK = threading.Lock()
+_FLUSH_INTERVAL_SEC = 1.0
+_flusher_started = False
+
+
+def _start_flusher():
+    global _flusher_started
+    if _flusher_started:
+        return
+    _flusher_started = True
+
+    def _loop():
+        while True:
+            time.sleep(_FLUSH_INTERVAL_SEC)
+            for p in list(_LOADED):
+                try:
+                    flush_status(p)
+                except Exception as e:
+                    print("[WARN] flush_status failed:", e)
+
+    threading.Thread(target=_loop, daemon=True, name="status-flusher").start()
+
+
 def write_status(path: str, camera_id: str, track_id: int, prefall: bool, dwell: float, note: Optional[str]=None):
     ensure_dir(path)
-    data = {}
-    if os.path.exists(path):
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception:
+    with _CACHE_LOCK:
+        if path not in _LOADED:
             data = {}
-    now = time.strftime("%Y-%m-%d %H:%M:%S")
-    key = f"{camera_id}:{track_id}"
-    data[key] = {
-        "timestamp": now,
-        "camera": camera_id,
-        "track_id": track_id,
-        "prefall": prefall,
-        "dwell_sec": round(dwell, 2),
-        "color": "red" if prefall else "green",
-        "note": note or ""
-    }
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+            if os.path.exists(path):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except Exception:
+                    data = {}
+            _STATE_CACHE[path] = data
+            _LOADED.add(path)
+            _start_flusher()
+        key = f"{camera_id}:{track_id}"
+        _STATE_CACHE[path][key] = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "camera": camera_id,
+            "track_id": track_id,
+            "prefall": prefall,
+            "dwell_sec": round(dwell, 2),
+            "color": "red" if prefall else "green",
+            "note": note or ""
+        }
+
+
+def flush_status(path: str):
+    """path의 인메모리 상태를 임시 파일에 쓰고 os.replace로 바꿔치기.
+
+    외부 소비자가 쓰다 만 파일을 읽는 일이 없도록 원자적으로 교체한다.
+    """
+    with _CACHE_LOCK:
+        if path not in _LOADED:
+            return
+        data = dict(_STATE_CACHE[path])
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(_dumps_pretty(data))
+    os.replace(tmp, path)
+
+
+class StatusWriter:
+    """status.json의 append-only 대체재.
+
+    write_status()는 호출될 때마다 상태 파일 전체를 읽고/파싱하고/다시 쓰기
+    때문에 probe 콜백 안에서 (객체 x 프레임)마다 O(상태크기) I/O가 발생한다.
+    StatusWriter는:
+      - 이벤트마다 status.jsonl에 한 줄만 append (버퍼링된 write 한 번)
+      - 최신 상태는 메모리 dict(_cache)에 유지
+      - 백그라운드 데몬 스레드가 snapshot_interval초마다 status.json을
+        os.replace로 원자적으로 갱신 (외부 소비자는 기존 포맷 그대로 읽음)
+    """
+
+    def __init__(self, path: str, snapshot_interval: float = 1.0):
+        ensure_dir(path)
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        # line-buffered append: update()당 write 한 번이면 끝
+        jsonl_path = path + "l" if path.endswith(".json") else path + ".jsonl"
+        self._fp = open(jsonl_path, "a", encoding="utf-8", buffering=1)
+        self._thread = threading.Thread(target=self._snapshot_loop, daemon=True)
+        self._thread.start()
+
+    def update(self, camera_id: str, track_id: int, prefall: bool, dwell: float,
+               note: Optional[str] = None):
+        record = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "camera": camera_id,
+            "track_id": track_id,
+            "prefall": prefall,
+            "dwell_sec": round(dwell, 2),
+            "color": "red" if prefall else "green",
+            "note": note or ""
+        }
+        self._fp.write(_dumps_line(record) + "\n")
+        key = f"{camera_id}:{track_id}"
+        with self._lock:
+            self._cache[key] = record
+            self._dirty = True
+
+    def _snapshot_loop(self):
+        while True:
+            time.sleep(self.snapshot_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                # 일시적 I/O 오류(ENOSPC 등)로 스냅샷 스레드가 죽지 않게
+                print("[WARN] status snapshot failed:", e)
+
+    def flush(self):
+        """_cache를 status.json으로 원자적으로 내보낸다."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._cache)
+            self._dirty = False
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(_dumps_pretty(data))
+        os.replace(tmp, self.path)
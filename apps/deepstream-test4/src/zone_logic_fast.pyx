@@ -0,0 +1,245 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+# src/zone_logic_fast.pyx
+#
+# zone_logic_simple.SimpleZoneMonitor의 Cython 구현.
+# 프레임당 임계 경로(PIP + 엣지 거리 + dwell 갱신)를 typed double 루프로
+# 내리고, update_batch의 기하 루프는 GIL을 풀고 돈다.
+#
+# 빌드 (apps/deepstream-test4에서):
+#   python setup.py build_ext --inplace
+#
+# 컴파일된 모듈이 없으면 deepstream_test_4.py가 순수 파이썬 구현으로
+# 폴백하므로 빌드는 선택 사항이다.
+
+import numpy as np
+
+from libc.math cimport sqrt
+
+
+cdef class SimpleZoneMonitor:
+    cdef public object cfg
+    cdef public object bed_polygon
+    cdef public double dwell
+    cdef public bint prev_in_zone1
+
+    cdef double d2_edge, T_alert, cooldown_sec, fps
+    cdef double bx0, by0, bx1, by1
+    cdef Py_ssize_t m
+    cdef double[::1] ax, ay, vx, vy, inv_v2
+
+    cdef dict _slot_of
+    cdef object _dwell_np, _cooldown_np
+
+    # 시간 서브샘플링 (zone_logic_simple과 동일한 cfg.skip 계약)
+    cdef int _skip
+    cdef long _frame_mod
+    cdef object _last_geom        # update()용 (in_zone1, dist)
+    cdef object _last_ids         # update_batch()용 직전 track_id 리스트
+    cdef object _last_in_zone1    # update_batch()용 직전 판정 배열
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.bed_polygon = cfg.bed_polygon
+        self.d2_edge = cfg.thresholds.d2_edge
+        self.T_alert = cfg.thresholds.T_alert
+        self.cooldown_sec = cfg.thresholds.cooldown_sec
+        self.fps = cfg.fps
+
+        poly = np.asarray(cfg.bed_polygon, dtype=np.float64)
+        nxt = np.roll(poly, -1, axis=0)
+        self.m = poly.shape[0]
+        self.ax = np.ascontiguousarray(poly[:, 0])
+        self.ay = np.ascontiguousarray(poly[:, 1])
+        vx = nxt[:, 0] - poly[:, 0]
+        vy = nxt[:, 1] - poly[:, 1]
+        self.vx = np.ascontiguousarray(vx)
+        self.vy = np.ascontiguousarray(vy)
+        v2 = vx * vx + vy * vy
+        self.inv_v2 = np.ascontiguousarray(
+            np.where(v2 > 0.0, 1.0 / np.where(v2 > 0.0, v2, 1.0), 0.0))
+
+        self.bx0 = poly[:, 0].min()
+        self.bx1 = poly[:, 0].max()
+        self.by0 = poly[:, 1].min()
+        self.by1 = poly[:, 1].max()
+
+        self.dwell = 0.0
+        self.prev_in_zone1 = False
+        self._slot_of = {}
+        self._dwell_np = np.zeros(0, dtype=np.float64)
+        self._cooldown_np = np.zeros(0, dtype=np.float64)
+
+        self._skip = max(int(getattr(cfg, "skip", 1)), 1)
+        self._frame_mod = 0
+        self._last_geom = None
+        self._last_ids = None
+        self._last_in_zone1 = None
+
+    cdef bint _pip(self, double x, double y) nogil:
+        # 나눗셈 없는 외적 부호 ray casting (zone_logic_simple과 동일)
+        cdef bint inside = False
+        cdef Py_ssize_t i, j
+        cdef double x1, y1, x2, y2, dx, dy, side
+        for i in range(self.m):
+            x1 = self.ax[i]
+            y1 = self.ay[i]
+            j = i + 1
+            if j == self.m:
+                j = 0
+            x2 = self.ax[j]
+            y2 = self.ay[j]
+            dx = x2 - x1
+            dy = y2 - y1
+            side = (x - x1) * dy - dx * (y - y1)
+            if ((y1 > y) != (y2 > y)) and ((side < 0.0) != (dy < 0.0)):
+                inside = not inside
+        return inside
+
+    cdef double _edge_dist(self, double px, double py) nogil:
+        cdef double dmin = 1e308
+        cdef double wx, wy, t, ex, ey, d
+        cdef Py_ssize_t i
+        for i in range(self.m):
+            wx = px - self.ax[i]
+            wy = py - self.ay[i]
+            t = (wx * self.vx[i] + wy * self.vy[i]) * self.inv_v2[i]
+            if t < 0.0:
+                t = 0.0
+            elif t > 1.0:
+                t = 1.0
+            ex = wx - t * self.vx[i]
+            ey = wy - t * self.vy[i]
+            d = sqrt(ex * ex + ey * ey)
+            if d < dmin:
+                dmin = d
+        return dmin
+
+    def update(self, bbox, dt=None):
+        """zone_logic_simple.SimpleZoneMonitor.update와 같은 의미/반환."""
+        cdef double c_dt
+        if dt is None:
+            c_dt = 1.0 / max(self.fps, 1e-6)
+        else:
+            c_dt = dt
+        cdef double x = bbox[0]
+        cdef double y = bbox[1]
+        cdef double w = bbox[2]
+        cdef double h = bbox[3]
+        cdef double px = x + w / 2.0
+        cdef double py = y + h
+        cdef bint in_zone1 = False
+        cdef double dist = -1.0
+        self._frame_mod += 1
+        if (self._skip > 1 and self._last_geom is not None
+                and self._frame_mod % self._skip != 0):
+            # 스킵 프레임: 직전 기하 판정 재사용 (dwell/level은 계속 갱신)
+            in_zone1 = self._last_geom[0]
+            dist = self._last_geom[1]
+        else:
+            if self.bx0 <= px <= self.bx1 and self.by0 <= py <= self.by1:
+                if self._pip(px, py):
+                    dist = self._edge_dist(px, py)
+                    if dist <= self.d2_edge:
+                        in_zone1 = True
+            self._last_geom = (in_zone1, dist)
+        if in_zone1:
+            self.dwell += c_dt
+        else:
+            self.dwell = 0.0
+        alert = in_zone1 and (self.dwell >= self.T_alert)
+        if not in_zone1:
+            level = "SAFE"
+        elif alert:
+            level = "PREFALL_ALERT"
+        else:
+            level = "PREFALL_SHORT"
+        self.prev_in_zone1 = in_zone1
+        return {
+            "in_zone1": bool(in_zone1),
+            "dwell": round(self.dwell, 3),
+            "alert": alert,
+            "level": level,
+            "edge_dist": dist if dist >= 0.0 else None,
+        }
+
+    def update_batch(self, bboxes, track_ids, dt=None):
+        """zone_logic_simple의 update_batch와 같은 반환 형식.
+
+        기하 루프는 nogil로 돌아서 멀티 스트림에서도 probe가 GIL을
+        잡고 있지 않다.
+        """
+        cdef double c_dt
+        if dt is None:
+            c_dt = 1.0 / max(self.fps, 1e-6)
+        else:
+            c_dt = dt
+
+        bb = np.ascontiguousarray(
+            np.asarray(bboxes, dtype=np.float64).reshape(-1, 4))
+        cdef Py_ssize_t n = bb.shape[0]
+        if n == 0:
+            return (np.zeros(0, dtype=bool), np.zeros(0), [],
+                    np.zeros(0, dtype=bool))
+
+        in_zone1_u8 = np.zeros(n, dtype=np.uint8)
+
+        cdef double[:, ::1] b_mv = bb
+        cdef unsigned char[::1] z_mv = in_zone1_u8
+        cdef double px, py
+        cdef Py_ssize_t i
+
+        self._frame_mod += 1
+        if (self._skip > 1 and self._last_in_zone1 is not None
+                and self._frame_mod % self._skip != 0
+                and list(track_ids) == self._last_ids):
+            # 스킵 프레임: 트랙 구성이 그대로면 직전 기하 판정 재사용
+            # (dwell/cooldown은 아래에서 평소처럼 dt만큼 진행)
+            in_mask = self._last_in_zone1
+        else:
+            with nogil:
+                for i in range(n):
+                    px = b_mv[i, 0] + b_mv[i, 2] / 2.0
+                    py = b_mv[i, 1] + b_mv[i, 3]
+                    if px < self.bx0 or px > self.bx1 or py < self.by0 or py > self.by1:
+                        continue
+                    if not self._pip(px, py):
+                        continue
+                    if self._edge_dist(px, py) <= self.d2_edge:
+                        z_mv[i] = 1
+
+            in_mask = in_zone1_u8.astype(bool)
+            self._last_ids = list(track_ids)
+            self._last_in_zone1 = in_mask
+
+        # per-track 상태 갱신 (zone_logic_simple의 SoA 경로와 동일)
+        old_n = len(self._slot_of)
+        for t in track_ids:
+            # 같은 새 id가 한 프레임에 두 번 와도 슬롯은 한 번만 배정
+            if t not in self._slot_of:
+                self._slot_of[t] = len(self._slot_of)
+        new_n = len(self._slot_of)
+        if new_n > old_n:
+            self._dwell_np = np.resize(self._dwell_np, new_n)
+            self._dwell_np[old_n:] = 0.0
+            self._cooldown_np = np.resize(self._cooldown_np, new_n)
+            self._cooldown_np[old_n:] = 0.0
+        slots = np.fromiter((self._slot_of[t] for t in track_ids),
+                            dtype=np.intp, count=len(track_ids))
+        dwells = np.where(in_mask, self._dwell_np[slots] + c_dt, 0.0)
+        self._dwell_np[slots] = dwells
+        alerts = in_mask & (dwells >= self.T_alert)
+        cooldown = self._cooldown_np[slots]
+        new_alerts = alerts & (cooldown <= 0.0)
+        self._cooldown_np[slots] = np.where(
+            new_alerts, self.cooldown_sec, np.maximum(cooldown - c_dt, 0.0))
+
+        levels = []
+        for i in range(n):
+            if not in_mask[i]:
+                levels.append("SAFE")
+            elif alerts[i]:
+                levels.append("PREFALL_ALERT")
+            else:
+                levels.append("PREFALL_SHORT")
+
+        return in_mask, dwells, levels, new_alerts